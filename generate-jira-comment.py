@@ -10,8 +10,31 @@ import sys
 import json
 import subprocess
 import argparse
-from datetime import datetime
-from typing import Optional, Dict, Any
+import atexit
+import functools
+import hashlib
+import queue
+import random
+import re
+import shutil
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple, Callable
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# Regex engine for scanning model output: RE2 matches in linear time whatever the
+# input, so use it when google-re2 is installed
+try:
+    import re2 as regex_engine
+except ImportError:
+    regex_engine = re
 
 # Color codes for terminal output
 BLUE = '\033[94m'
@@ -20,12 +43,315 @@ YELLOW = '\033[93m'
 RED = '\033[91m'
 NC = '\033[0m'  # No Color
 
+# Shared HTTP session, created lazily on first API call so that `requests`
+# is only imported when we actually talk to a provider
+_SESSION = None
+
+# Resolved cursor-agent path, cached after the first successful lookup
+_CURSOR_AGENT = None
+
+# Shared pool for overlapping short blocking lookups (keychain, PATH search)
+_EXECUTOR = ThreadPoolExecutor(max_workers=4)
+
+# Hedged start delays (seconds) for the provider race: OpenAI starts right away,
+# Claude only joins if OpenAI hasn't started responding (or has failed) by then
+OPENAI_START_DELAY = 0.0
+CLAUDE_START_DELAY = 0.5
+
+# Models used by the API providers; OPENAI_MODEL overrides the OpenAI one
+DEFAULT_OPENAI_MODEL = 'gpt-4.1-mini'
+CLAUDE_MODEL = 'claude-3-5-sonnet-20241022'
+
+# Output budget per comment; realistic comments run ~300-600 tokens. Generation
+# also stops early if the model starts echoing the prompt's closing reminder.
+DEFAULT_MAX_TOKENS = 800
+STOP_SEQUENCES = ['\n\nREMEMBER:']
+
+# Batch mode packs several commits into one API call. Sub-batches are split so
+# the commit contexts stay within a conservative 8K-token prompt and the
+# combined output fits the providers' output limits.
+BATCH_MAX_COMMITS = 8
+BATCH_PROMPT_TOKEN_BUDGET = 6000
+BATCH_MAX_OUTPUT_TOKENS = 8192
+
+# Claude has no JSON response mode, so batch replies are prefilled with this
+CLAUDE_JSON_PREFILL = '{"comments": ['
+
+# Timeouts in seconds. API calls use a (connect, read) pair; since responses are
+# streamed, the read timeout bounds each gap between chunks. Cursor is the last
+# fallback, so a hung cursor-agent (e.g. waiting on auth) is cut off early.
+API_CONNECT_TIMEOUT = 5
+API_READ_TIMEOUT = 45
+CURSOR_TIMEOUT = 25
+
+# Transient API failures are retried with exponential backoff and jitter;
+# other 4xx responses fail fast so we fall through to the next provider
+RETRY_ATTEMPTS = 3
+RETRY_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Local cache of generated comments, keyed by commit SHA + prompt hash.
+# Set GITQUICK_CACHE=0 to disable it.
+CACHE_PATH = os.path.expanduser('~/.cache/gitquick/comments.sqlite')
+CACHE_TTL = 7 * 24 * 60 * 60  # 7 days
+
+# Optional semantic cache (--semantic-cache): near-duplicate commits reuse an
+# earlier comment. Needs sentence-transformers and faiss-cpu.
+SEMANTIC_INDEX_PATH = os.path.expanduser('~/.cache/gitquick/emb.index')
+SEMANTIC_ENTRIES_PATH = os.path.expanduser('~/.cache/gitquick/emb.json')
+SEMANTIC_MODEL = 'all-MiniLM-L6-v2'
+SEMANTIC_THRESHOLD = 0.95
+SEMANTIC_TTL = CACHE_TTL
+SEMANTIC_MAX_ENTRIES = 5000
+
+# Semantic cache instance, created on first use; False if its dependencies are missing
+_SEMANTIC_CACHE = None
+
 
 def print_color(message: str, color: str = NC):
     """Print colored message to stderr"""
     print(f"{color}{message}{NC}", file=sys.stderr)
 
 
+class _RateLimiter:
+    """
+    Client-side token bucket for a provider's requests- and tokens-per-minute limits.
+    
+    Callers block in acquire() until the request fits within both budgets, so we
+    pace ourselves instead of tripping the server's 429 retry penalty.
+    """
+    
+    def __init__(self, rpm: int, tpm: int):
+        self.rpm = rpm
+        self.tpm = tpm
+        self.requests_available = float(rpm)
+        self.tokens_available = float(tpm)
+        self.last_update = time.monotonic()
+        self.blocked_until = 0.0
+        self.lock = threading.Lock()
+    
+    def _refill(self, now: float):
+        elapsed = now - self.last_update
+        self.requests_available = min(self.rpm, self.requests_available + elapsed * self.rpm / 60)
+        self.tokens_available = min(self.tpm, self.tokens_available + elapsed * self.tpm / 60)
+        self.last_update = now
+    
+    def acquire(self, tokens: int):
+        """Block until one request of roughly `tokens` tokens can be sent"""
+        tokens = min(tokens, self.tpm)
+        while True:
+            with self.lock:
+                now = time.monotonic()
+                self._refill(now)
+                wait = self.blocked_until - now
+                if wait <= 0:
+                    if self.requests_available >= 1 and self.tokens_available >= tokens:
+                        self.requests_available -= 1
+                        self.tokens_available -= tokens
+                        return
+                    wait = max(
+                        (1 - self.requests_available) * 60 / self.rpm,
+                        (tokens - self.tokens_available) * 60 / self.tpm
+                    )
+            time.sleep(wait)
+    
+    def pause(self, seconds: float):
+        """Hold back all requests for `seconds`, e.g. after a 429 with Retry-After"""
+        with self.lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+def _env_int(name: str, default: int) -> int:
+    """Read a positive integer from the environment, falling back to default"""
+    try:
+        value = int(os.environ.get(name, default))
+    except ValueError:
+        return default
+    return value if value > 0 else default
+
+
+# Per-provider rate limits, overridable to match your account's tier
+_OPENAI_LIMITER = _RateLimiter(_env_int('OPENAI_RPM', 500), _env_int('OPENAI_TPM', 200000))
+_CLAUDE_LIMITER = _RateLimiter(_env_int('ANTHROPIC_RPM', 50), _env_int('ANTHROPIC_TPM', 40000))
+
+
+def estimate_tokens(system_prompt: str, prompt: str, max_tokens: int) -> int:
+    """Rough token cost of a request: ~4 characters per prompt token plus the output budget"""
+    return (len(system_prompt) + len(prompt)) // 4 + max_tokens
+
+
+def retry_after(response) -> Optional[float]:
+    """Parse the Retry-After header of a rate-limited response, in seconds"""
+    try:
+        return float(response.headers.get('retry-after', ''))
+    except ValueError:
+        return None
+
+
+def json_dumps(obj: Any) -> bytes:
+    """Encode JSON to bytes, using orjson when it's installed"""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    return json.dumps(obj).encode('utf-8')
+
+
+def json_loads(data: bytes) -> Any:
+    """Decode JSON from bytes or str, using orjson when it's installed"""
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+def openai_model() -> str:
+    """Get the OpenAI model to use"""
+    return os.getenv('OPENAI_MODEL', DEFAULT_OPENAI_MODEL)
+
+
+def get_session():
+    """Get the shared HTTP session, reusing pooled connections across calls"""
+    global _SESSION
+    if _SESSION is None:
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        session = requests.Session()
+        session.mount('https://', HTTPAdapter(pool_connections=4, pool_maxsize=8))
+        _SESSION = session
+    return _SESSION
+
+
+def backoff_delay(attempt: int) -> float:
+    """Exponential backoff with jitter: ~1s, ~2s, ~4s... capped at 10s"""
+    return min(10.0, 2 ** (attempt - 1) + random.uniform(0, 1))
+
+
+def _post_json(
+    name: str,
+    url: str,
+    headers: Dict[str, str],
+    body: Dict[str, Any],
+    timeout: Tuple[float, float],
+    limiter: _RateLimiter,
+    tokens: int,
+    stream: bool = False,
+    attempts: int = RETRY_ATTEMPTS,
+    cancel: Optional[threading.Event] = None
+):
+    """
+    POST a JSON body through the shared session and return the response.
+    
+    Each attempt first takes its share of the provider's rate limit. Connection
+    errors, timeouts, 429s and 5xx responses are retried, up to `attempts` tries
+    in total. Only a 429 pauses the provider's shared limiter, honouring its
+    Retry-After; other backoff waits hold up just this request. Once `cancel` is
+    set no further request is sent, a backoff wait is cut short, and None is
+    returned.
+    """
+    import requests
+    
+    session = get_session()
+    data = json_dumps(body)
+    for attempt in range(1, attempts + 1):
+        limiter.acquire(tokens)
+        if cancel is not None and cancel.is_set():
+            return None
+        try:
+            response = session.post(url, headers=headers, data=data, timeout=timeout, stream=stream)
+        except (requests.ConnectionError, requests.Timeout) as e:
+            if attempt == attempts or (cancel is not None and cancel.is_set()):
+                raise
+            reason = type(e).__name__
+            delay = backoff_delay(attempt)
+        else:
+            delay = backoff_delay(attempt)
+            if (response.status_code not in RETRY_STATUS_CODES or attempt == attempts
+                    or (cancel is not None and cancel.is_set())):
+                return response
+            response.close()
+            reason = f"HTTP {response.status_code}"
+            if response.status_code == 429:
+                delay = max(delay, retry_after(response) or 0)
+                limiter.pause(delay)
+        
+        print_color(f"⚠️  {name} {reason}, retrying in {delay:.1f}s ({attempt}/{attempts - 1})...", YELLOW)
+        if cancel is None:
+            time.sleep(delay)
+        elif cancel.wait(delay):
+            return None
+
+
+def read_event_stream(
+    name: str,
+    response,
+    extract_text: Callable[[Dict[str, Any]], Optional[str]],
+    is_truncated: Callable[[Dict[str, Any]], bool],
+    cancel: Optional[threading.Event] = None
+) -> Tuple[str, bool]:
+    """
+    Accumulate the text deltas of a server-sent event stream.
+    
+    Returns the text and whether generation stopped at the max_tokens limit.
+    When stderr is a terminal, a running character count is shown so the user
+    sees generation progress instead of a silent wait. If `cancel` gets set
+    (another provider won the race), the stream is closed and '' is returned.
+    """
+    chunks = []
+    length = 0
+    truncated = False
+    show_progress = sys.stderr.isatty()
+    try:
+        for line in response.iter_lines():
+            if cancel is not None and cancel.is_set():
+                return '', False
+            if not line.startswith(b'data:'):
+                continue
+            payload = line[5:].strip()
+            if payload == b'[DONE]':
+                break
+            
+            event = json_loads(payload)
+            if 'error' in event:
+                raise RuntimeError(event['error'].get('message', 'stream error'))
+            
+            truncated = truncated or is_truncated(event)
+            text = extract_text(event)
+            if text:
+                chunks.append(text)
+                length += len(text)
+                if show_progress:
+                    print(f"\r{BLUE}✍️  {name} is writing... {length} chars{NC}", end='', file=sys.stderr, flush=True)
+    finally:
+        response.close()
+        if show_progress:
+            print('\r\033[K', end='', file=sys.stderr, flush=True)
+    
+    return ''.join(chunks), truncated
+
+
+def _openai_delta(event: Dict[str, Any]) -> Optional[str]:
+    """Extract the text delta from an OpenAI chat completion chunk"""
+    choices = event.get('choices')
+    return choices[0].get('delta', {}).get('content') if choices else None
+
+
+def _claude_delta(event: Dict[str, Any]) -> Optional[str]:
+    """Extract the text delta from an Anthropic messages stream event"""
+    if event.get('type') == 'content_block_delta':
+        return event['delta'].get('text')
+    return None
+
+
+def _openai_truncated(event: Dict[str, Any]) -> bool:
+    """Whether an OpenAI chat completion chunk reports hitting max_tokens"""
+    choices = event.get('choices')
+    return bool(choices) and choices[0].get('finish_reason') == 'length'
+
+
+def _claude_truncated(event: Dict[str, Any]) -> bool:
+    """Whether an Anthropic messages stream event reports hitting max_tokens"""
+    return event.get('type') == 'message_delta' and event['delta'].get('stop_reason') == 'max_tokens'
+
+
+@functools.lru_cache(maxsize=1)
 def get_openai_api_key() -> Optional[str]:
     """Get OpenAI API key from environment or keychain"""
     api_key = os.environ.get('OPENAI_API_KEY')
@@ -41,10 +367,11 @@ def get_openai_api_key() -> Optional[str]:
             check=True
         )
         return result.stdout.strip()
-    except subprocess.CalledProcessError:
+    except (subprocess.CalledProcessError, OSError):
         return None
 
 
+@functools.lru_cache(maxsize=1)
 def get_anthropic_api_key() -> Optional[str]:
     """Get Anthropic API key from environment or keychain"""
     api_key = os.environ.get('ANTHROPIC_API_KEY')
@@ -60,113 +387,222 @@ def get_anthropic_api_key() -> Optional[str]:
             check=True
         )
         return result.stdout.strip()
-    except subprocess.CalledProcessError:
+    except (subprocess.CalledProcessError, OSError):
         return None
 
 
-def generate_with_openai(prompt: str, api_key: str) -> Optional[str]:
-    """Generate comment using OpenAI API"""
-    import requests
+def generate_with_openai(
+    system_prompt: str,
+    prompt: str,
+    api_key: str,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    json_mode: bool = False,
+    read_timeout: float = API_READ_TIMEOUT,
+    attempts: int = RETRY_ATTEMPTS,
+    cancel: Optional[threading.Event] = None,
+    on_response: Optional[Callable[[], None]] = None,
+    retry_truncated: bool = True
+) -> Optional[str]:
+    """
+    Generate comment using OpenAI API, optionally forcing a JSON object response.
+    
+    `on_response` is called once the response starts; setting `cancel` stops the
+    request early and returns None. A reply cut off at `max_tokens` is retried
+    once with twice the budget (JSON replies are already at the batch ceiling),
+    and None is returned if it's still cut off.
+    """
+    body = {
+        'model': openai_model(),
+        'messages': [
+            {
+                'role': 'system',
+                'content': system_prompt
+            },
+            {
+                'role': 'user',
+                'content': prompt
+            }
+        ],
+        'temperature': 0.7,
+        'max_tokens': max_tokens,
+        'stop': STOP_SEQUENCES,
+        'stream': True
+    }
+    if json_mode:
+        body['response_format'] = {'type': 'json_object'}
     
     try:
-        response = requests.post(
+        response = _post_json(
+            'OpenAI',
             'https://api.openai.com/v1/chat/completions',
             headers={
                 'Authorization': f'Bearer {api_key}',
                 'Content-Type': 'application/json'
             },
-            json={
-                'model': os.getenv('OPENAI_MODEL', 'gpt-4.1-mini'),
-                'messages': [
-                    {
-                        'role': 'system',
-                        'content': 'You are a helpful senior developer writing informal updates to your team. Write naturally and conversationally, like you\'re explaining what you did to a colleague. Output ONLY the comment text itself - no meta-commentary or explanations about what you\'re writing.'
-                    },
-                    {
-                        'role': 'user',
-                        'content': prompt
-                    }
-                ],
-                'temperature': 0.7,
-                'max_tokens': 2000
-            },
-            timeout=60
+            body=body,
+            timeout=(API_CONNECT_TIMEOUT, read_timeout),
+            limiter=_OPENAI_LIMITER,
+            tokens=estimate_tokens(system_prompt, prompt, max_tokens),
+            stream=True,
+            attempts=attempts,
+            cancel=cancel
         )
+        if response is None:
+            return None
         
         if response.status_code == 200:
-            data = response.json()
-            return data['choices'][0]['message']['content'].strip()
+            if on_response:
+                on_response()
+            text, truncated = read_event_stream('OpenAI', response, _openai_delta, _openai_truncated, cancel)
+            if cancel is not None and cancel.is_set():
+                return None
+            if truncated:
+                if json_mode or not retry_truncated:
+                    print_color(f"⚠️  OpenAI reply was cut off at {max_tokens} tokens, discarding it", YELLOW)
+                    return None
+                print_color(f"⚠️  OpenAI reply was cut off at {max_tokens} tokens, retrying with {max_tokens * 2}...", YELLOW)
+                return generate_with_openai(
+                    system_prompt, prompt, api_key, max_tokens * 2, json_mode, read_timeout, attempts, cancel,
+                    retry_truncated=False
+                )
+            return text.strip() or None
         else:
+            response.close()
+            if cancel is not None and cancel.is_set():
+                return None
             print_color(f"❌ OpenAI API error: {response.status_code}", RED)
             return None
             
     except Exception as e:
-        print_color(f"❌ OpenAI error: {str(e)}", RED)
+        if cancel is None or not cancel.is_set():
+            print_color(f"❌ OpenAI error: {str(e)}", RED)
         return None
 
 
-def generate_with_claude(prompt: str, api_key: str) -> Optional[str]:
-    """Generate comment using Anthropic Claude API"""
-    import requests
+def generate_with_claude(
+    system_prompt: str,
+    prompt: str,
+    api_key: str,
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    json_mode: bool = False,
+    read_timeout: float = API_READ_TIMEOUT,
+    attempts: int = RETRY_ATTEMPTS,
+    cancel: Optional[threading.Event] = None,
+    on_response: Optional[Callable[[], None]] = None,
+    retry_truncated: bool = True
+) -> Optional[str]:
+    """
+    Generate comment using Anthropic Claude API, optionally prefilling a JSON object response.
+    
+    `on_response` is called once the response starts; setting `cancel` stops the
+    request early and returns None. A reply cut off at `max_tokens` is retried
+    once with twice the budget (JSON replies are already at the batch ceiling),
+    and None is returned if it's still cut off.
+    """
+    messages = [
+        {
+            'role': 'user',
+            'content': prompt
+        }
+    ]
+    prefill = ''
+    if json_mode:
+        prefill = CLAUDE_JSON_PREFILL
+        messages.append({'role': 'assistant', 'content': prefill})
     
     try:
-        response = requests.post(
+        response = _post_json(
+            'Claude',
             'https://api.anthropic.com/v1/messages',
             headers={
                 'x-api-key': api_key,
                 'anthropic-version': '2023-06-01',
                 'content-type': 'application/json'
             },
-            json={
-                'model': 'claude-3-5-sonnet-20241022',
-                'max_tokens': 2000,
+            body={
+                'model': CLAUDE_MODEL,
+                'max_tokens': max_tokens,
                 'temperature': 0.7,
-                'system': 'You are a helpful senior developer writing informal updates to your team. Write naturally and conversationally, like you\'re explaining what you did to a colleague. Output ONLY the comment text itself - no meta-commentary or explanations about what you\'re writing.',
-                'messages': [
+                'stop_sequences': STOP_SEQUENCES,
+                'stream': True,
+                'system': [
                     {
-                        'role': 'user',
-                        'content': prompt
+                        'type': 'text',
+                        'text': system_prompt,
+                        'cache_control': {'type': 'ephemeral'}
                     }
-                ]
+                ],
+                'messages': messages
             },
-            timeout=60
+            timeout=(API_CONNECT_TIMEOUT, read_timeout),
+            limiter=_CLAUDE_LIMITER,
+            tokens=estimate_tokens(system_prompt, prompt, max_tokens),
+            stream=True,
+            attempts=attempts,
+            cancel=cancel
         )
+        if response is None:
+            return None
         
         if response.status_code == 200:
-            data = response.json()
-            return data['content'][0]['text'].strip()
+            if on_response:
+                on_response()
+            text, truncated = read_event_stream('Claude', response, _claude_delta, _claude_truncated, cancel)
+            if cancel is not None and cancel.is_set():
+                return None
+            if truncated:
+                if json_mode or not retry_truncated:
+                    print_color(f"⚠️  Claude reply was cut off at {max_tokens} tokens, discarding it", YELLOW)
+                    return None
+                print_color(f"⚠️  Claude reply was cut off at {max_tokens} tokens, retrying with {max_tokens * 2}...", YELLOW)
+                return generate_with_claude(
+                    system_prompt, prompt, api_key, max_tokens * 2, json_mode, read_timeout, attempts, cancel,
+                    retry_truncated=False
+                )
+            return (prefill + text).strip() if text.strip() else None
         else:
+            response.close()
+            if cancel is not None and cancel.is_set():
+                return None
             print_color(f"❌ Claude API error: {response.status_code}", RED)
             return None
             
     except Exception as e:
-        print_color(f"❌ Claude error: {str(e)}", RED)
+        if cancel is None or not cancel.is_set():
+            print_color(f"❌ Claude error: {str(e)}", RED)
         return None
 
 
-def generate_with_cursor(prompt: str) -> Optional[str]:
+def find_cursor_agent() -> Optional[str]:
+    """Locate the cursor-agent binary on PATH or in common installation paths"""
+    global _CURSOR_AGENT
+    if _CURSOR_AGENT:
+        return _CURSOR_AGENT
+    
+    cursor_agent = shutil.which('cursor-agent')
+    if not cursor_agent:
+        # Try common installation paths
+        cursor_paths = [
+            os.path.expanduser('~/.local/bin/cursor-agent'),
+            os.path.expanduser('~/.cursor/bin/cursor-agent'),
+            '/usr/local/bin/cursor-agent'
+        ]
+        for path in cursor_paths:
+            if os.path.isfile(path) and os.access(path, os.X_OK):
+                cursor_agent = path
+                break
+    
+    _CURSOR_AGENT = cursor_agent
+    return cursor_agent
+
+
+def generate_with_cursor(prompt: str, timeout: float = CURSOR_TIMEOUT) -> Optional[str]:
     """Generate comment using Cursor Agent CLI"""
     try:
-        # Check if cursor-agent is available
-        result = subprocess.run(['which', 'cursor-agent'], capture_output=True, text=True)
-        if result.returncode != 0:
-            # Try common installation paths
-            cursor_paths = [
-                os.path.expanduser('~/.local/bin/cursor-agent'),
-                os.path.expanduser('~/.cursor/bin/cursor-agent'),
-                '/usr/local/bin/cursor-agent'
-            ]
-            cursor_agent = None
-            for path in cursor_paths:
-                if os.path.isfile(path) and os.access(path, os.X_OK):
-                    cursor_agent = path
-                    break
-            
-            if not cursor_agent:
-                print_color("❌ cursor-agent not found", RED)
-                return None
-        else:
-            cursor_agent = 'cursor-agent'
+        cursor_agent = find_cursor_agent()
+        if not cursor_agent:
+            print_color("❌ cursor-agent not found", RED)
+            return None
         
         # Run cursor-agent with prompt via stdin
         result = subprocess.run(
@@ -174,7 +610,7 @@ def generate_with_cursor(prompt: str) -> Optional[str]:
             input=prompt,
             capture_output=True,
             text=True,
-            timeout=60
+            timeout=timeout
         )
         
         if result.returncode == 0 and result.stdout.strip():
@@ -192,39 +628,15 @@ def generate_with_cursor(prompt: str) -> Optional[str]:
         return None
 
 
-def build_natural_prompt(commit_info: Dict[str, Any]) -> str:
-    """
-    Build a prompt that generates natural, developer-written comments.
-    
-    The goal is to make the AI write like a real developer updating their team,
-    not like formal documentation.
-    """
-    
-    commit_msg = commit_info.get('message', '')
-    commit_sha = commit_info.get('sha', '')
-    branch = commit_info.get('branch', '')
-    author = commit_info.get('author', '')
-    commit_date = commit_info.get('date', '')
-    commit_url = commit_info.get('url', '')
-    diff_summary = commit_info.get('diff_summary', '')
-    ticket_details = commit_info.get('ticket_details', '')
-    files_changed = commit_info.get('files_changed', 0)
-    
-    # Build the prompt
-    prompt = f"""CRITICAL INSTRUCTION: Output ONLY the Jira comment text itself. Do NOT include any meta-commentary, explanations, or descriptions about what you're writing. Your output will be posted directly to Jira.
+# Static instructions shared by every prompt, sent as the system prompt and kept
+# byte-for-byte identical across calls. At ~700 tokens this is below the
+# 1024-token minimum for Anthropic cache_control and OpenAI prefix caching, so
+# neither provider caches it today; it only starts paying off if it grows past that.
+SYSTEM_PROMPT = """You are a helpful senior developer writing informal updates to your team. Write naturally and conversationally, like you're explaining what you did to a colleague. Output ONLY the comment text itself - no meta-commentary or explanations about what you're writing.
 
-Write an informal Jira comment update from a developer who just completed a task. Write it like you're explaining what you did to your team lead or project manager - casual, conversational, but still professional.
-
-CONTEXT:
-- Commit: {commit_msg}
-- SHA: {commit_sha}
-- Branch: {branch}
-- Files changed: {files_changed}
-- Commit link: {commit_url}
-{"- Ticket context: " + ticket_details if ticket_details else ""}
+CRITICAL INSTRUCTION: Output ONLY the Jira comment text itself. Do NOT include any meta-commentary, explanations, or descriptions about what you're writing. Your output will be posted directly to Jira.
 
-CODE CHANGES:
-{diff_summary}
+Write an informal Jira comment update from a developer who just completed a task. Write it like you're explaining what you did to your team lead or project manager - casual, conversational, but still professional. The commit details and code changes are in the user message.
 
 IMPORTANT STYLE GUIDELINES:
 1. Write in FIRST PERSON ("I completed", "I fixed", "I updated") - like a developer writing their own update
@@ -254,7 +666,7 @@ Here's what I fixed:
 - Added a background service that keeps the session alive as long as the user is active
 - Fixed a race condition where multiple tabs could trigger conflicting refresh requests
 
-Commit: {commit_url}
+Commit: <link to the commit>
 
 To test this:
 1. Log in to the app
@@ -271,7 +683,68 @@ Let me know if you see any issues!"
 
 REMEMBER: Output ONLY the comment text. Start directly with something like "Hey team" or "Done with". Do NOT write things like "Here's the comment:" or "The comment is ready" or any other meta-text. Your output will be posted directly to Jira."""
 
-    return prompt
+
+# Per-commit part of the prompt, filled in from the commit info
+USER_PROMPT_TEMPLATE = """CONTEXT:
+- Commit: {message}
+- SHA: {sha}
+- Branch: {branch}
+- Files changed: {files_changed}
+- Commit link: {url}
+{ticket_line}
+
+CODE CHANGES:
+{diff_summary}
+
+Write the Jira comment for this commit."""
+
+
+# Digest of both static prompt parts, computed once at import so per-commit
+# cache keys don't rehash ~3KB of instructions
+PROMPT_DIGEST = hashlib.sha256(f"{SYSTEM_PROMPT}|{USER_PROMPT_TEMPLATE}".encode('utf-8')).hexdigest()
+
+# Instructions heading a batch request, followed by the per-commit prompts
+BATCH_PROMPT_HEADER = """Write one Jira comment for EACH of the {count} commits below, in the same order.
+Respond with ONLY a JSON object of the form {{"comments": ["<comment for commit 1>", ...]}} containing exactly {count} comments."""
+
+
+def build_natural_prompt(commit_info: Dict[str, Any]) -> Tuple[str, str]:
+    """
+    Build a prompt that generates natural, developer-written comments.
+    
+    The goal is to make the AI write like a real developer updating their team,
+    not like formal documentation. Returns a (system, user) tuple: the static
+    instructions in SYSTEM_PROMPT and the per-commit context.
+    """
+    
+    # Missing fields render as empty strings
+    info = defaultdict(str, commit_info)
+    info.setdefault('files_changed', 0)
+    ticket_details = info['ticket_details']
+    info['ticket_line'] = f"- Ticket context: {ticket_details}" if ticket_details else ""
+    
+    return SYSTEM_PROMPT, USER_PROMPT_TEMPLATE.format_map(info)
+
+
+# Meta-commentary that AIs sometimes lead with instead of the comment itself
+META_PATTERNS = [
+    "here's the comment",
+    "here is the comment",
+    "the comment is",
+    "i've generated",
+    "i've created",
+    "i've written",
+    "generated comment",
+    "here's what i",
+    "let me write",
+]
+
+# Phrases that typically open the actual comment
+COMMENT_STARTS = ['hey team', 'hi team', 'done with', 'just finished', 'completed']
+
+# Case-insensitivity is set inline since re2.compile doesn't take re's flags
+_META_RE = regex_engine.compile(r'(?i)^\s*(' + '|'.join(map(re.escape, META_PATTERNS)) + r')')
+_START_RE = regex_engine.compile('(?i)' + '|'.join(map(re.escape, COMMENT_STARTS)))
 
 
 def clean_ai_response(text: str) -> str:
@@ -282,108 +755,589 @@ def clean_ai_response(text: str) -> str:
     if not text:
         return text
     
-    # List of meta-commentary patterns to detect
-    meta_patterns = [
-        "here's the comment",
-        "here is the comment",
-        "the comment is",
-        "i've generated",
-        "i've created",
-        "i've written",
-        "generated comment",
-        "here's what i",
-        "let me write",
-    ]
-    
     # Check if the response starts with meta-commentary
-    lower_text = text.lower()
-    for pattern in meta_patterns:
-        if lower_text.startswith(pattern):
-            # This is likely meta-commentary, not the actual comment
-            print_color("⚠️  Detected meta-commentary in AI response, attempting to clean...", YELLOW)
-            # Try to find where the actual comment starts
-            lines = text.split('\n')
-            # Skip lines that look like meta-commentary
-            actual_comment_lines = []
-            found_start = False
-            for line in lines:
-                line_lower = line.lower().strip()
-                if not found_start:
-                    # Look for typical comment starts
-                    if any(start in line_lower for start in ['hey team', 'hi team', 'done with', 'just finished', 'completed']):
-                        found_start = True
-                        actual_comment_lines.append(line)
-                else:
-                    actual_comment_lines.append(line)
-            
-            if actual_comment_lines:
-                return '\n'.join(actual_comment_lines)
-            
-            # If we couldn't find a clear start, return original
-            print_color("⚠️  Could not identify actual comment, using original response", YELLOW)
-            return text
+    if not _META_RE.match(text):
+        return text
+    
+    # This is likely meta-commentary, not the actual comment
+    print_color("⚠️  Detected meta-commentary in AI response, attempting to clean...", YELLOW)
+    # Try to find where the actual comment starts
+    lines = text.split('\n')
+    # Skip lines that look like meta-commentary
+    actual_comment_lines = []
+    found_start = False
+    for line in lines:
+        if found_start:
+            actual_comment_lines.append(line)
+        # Look for typical comment starts, skipping blank lines without a regex scan
+        elif line and not line.isspace() and _START_RE.search(line):
+            found_start = True
+            actual_comment_lines.append(line)
+    
+    if actual_comment_lines:
+        return '\n'.join(actual_comment_lines)
     
+    # If we couldn't find a clear start, return original
+    print_color("⚠️  Could not identify actual comment, using original response", YELLOW)
     return text
 
 
-def generate_comment(commit_info: Dict[str, Any]) -> Optional[str]:
-    """Generate a natural Jira comment using available AI providers"""
+def cache_enabled() -> bool:
+    """Check whether the comment cache is enabled"""
+    return os.environ.get('GITQUICK_CACHE', '1') != '0'
+
+
+def _cache_connect() -> sqlite3.Connection:
+    """Open the comment cache database, creating it if needed"""
+    os.makedirs(os.path.dirname(CACHE_PATH), exist_ok=True)
+    conn = sqlite3.connect(CACHE_PATH)
+    conn.execute('CREATE TABLE IF NOT EXISTS comments (key TEXT PRIMARY KEY, ts INTEGER, text TEXT)')
+    return conn
+
+
+def _cache_get(key: str) -> Optional[str]:
+    """Look up a cached comment, ignoring entries older than CACHE_TTL"""
+    try:
+        conn = _cache_connect()
+        try:
+            row = conn.execute(
+                'SELECT text FROM comments WHERE key = ? AND ts >= ?',
+                (key, int(time.time()) - CACHE_TTL)
+            ).fetchone()
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError):
+        return None
+    return row[0] if row else None
+
+
+def _cache_put(key: str, text: str):
+    """Store a generated comment and prune expired entries"""
+    try:
+        conn = _cache_connect()
+        try:
+            with conn:
+                now = int(time.time())
+                conn.execute('INSERT OR REPLACE INTO comments (key, ts, text) VALUES (?, ?, ?)', (key, now, text))
+                conn.execute('DELETE FROM comments WHERE ts < ?', (now - CACHE_TTL,))
+        finally:
+            conn.close()
+    except (sqlite3.Error, OSError):
+        pass
+
+
+def semantic_text(commit_info: Dict[str, Any]) -> str:
+    """
+    The part of a commit the semantic cache compares on.
     
-    prompt = build_natural_prompt(commit_info)
+    Only the commit's own content is embedded; the shared prompt boilerplate
+    would otherwise dominate the embedding and make every commit look alike.
+    """
+    return '\n'.join(
+        str(commit_info.get(field) or '') for field in ('message', 'diff_summary', 'ticket_details')
+    )
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour cache of comments keyed by commit content embeddings.
     
-    # Try OpenAI first
-    openai_key = get_openai_api_key()
-    if openai_key:
-        print_color("🤖 Generating natural comment with OpenAI...", BLUE)
-        comment = generate_with_openai(prompt, openai_key)
-        if comment:
-            return clean_ai_response(comment)
+    Texts are embedded with a small sentence-transformers model and stored in a
+    FAISS inner-product index (cosine similarity, as embeddings are normalized),
+    persisted alongside a parallel JSON list of {sha, comment, ts} entries.
+    Entries expire after SEMANTIC_TTL and only the newest SEMANTIC_MAX_ENTRIES
+    are kept. New entries are written once, when the process exits.
+    """
     
-    # Try Claude
-    claude_key = get_anthropic_api_key()
-    if claude_key:
-        print_color("🤖 Generating natural comment with Claude...", BLUE)
-        comment = generate_with_claude(prompt, claude_key)
-        if comment:
-            return clean_ai_response(comment)
+    def __init__(self):
+        import faiss
+        from sentence_transformers import SentenceTransformer
+        
+        self.faiss = faiss
+        self.model = SentenceTransformer(SEMANTIC_MODEL)
+        self.embeddings = {}
+        self.index = None
+        self.entries = []
+        self.dirty = False
+        try:
+            with open(SEMANTIC_ENTRIES_PATH, 'rb') as f:
+                entries = json_loads(f.read())
+            index = faiss.read_index(SEMANTIC_INDEX_PATH)
+            if index.ntotal == len(entries):
+                self.index, self.entries = index, entries
+        except (OSError, ValueError, RuntimeError):
+            pass
+        if self.index is None:
+            self.index = faiss.IndexFlatIP(self.model.get_sentence_embedding_dimension())
+        else:
+            self._prune()
     
-    # Try Cursor Agent
-    print_color("🎨 Trying Cursor Agent...", BLUE)
-    comment = generate_with_cursor(prompt)
-    if comment:
-        return clean_ai_response(comment)
+    def _prune(self):
+        """Drop expired entries and cap the index at SEMANTIC_MAX_ENTRIES, newest first"""
+        cutoff = time.time() - SEMANTIC_TTL
+        keep = [i for i, entry in enumerate(self.entries) if entry.get('ts', 0) >= cutoff][-SEMANTIC_MAX_ENTRIES:]
+        if len(keep) == len(self.entries):
+            return
+        vectors = self.index.reconstruct_n(0, self.index.ntotal)
+        index = self.faiss.IndexFlatIP(self.index.d)
+        if keep:
+            index.add(vectors[keep])
+        self.index = index
+        self.entries = [self.entries[i] for i in keep]
+    
+    def _embed(self, text: str):
+        if text not in self.embeddings:
+            self.embeddings[text] = self.model.encode([text], normalize_embeddings=True).astype('float32')
+        return self.embeddings[text]
+    
+    def lookup(self, text: str, sha: str) -> Optional[str]:
+        """Return the comment of a near-identical earlier commit, noting which commit it came from"""
+        if not self.entries:
+            return None
+        scores, ids = self.index.search(self._embed(text), 1)
+        if scores[0][0] <= SEMANTIC_THRESHOLD:
+            return None
+        entry = self.entries[ids[0][0]]
+        if entry['sha'] == sha:
+            return entry['comment']
+        return f"{entry['comment']}\n\n_(adapted from commit {entry['sha']})_"
     
+    def add(self, text: str, sha: str, comment: str):
+        """Store a generated comment; it's persisted by save()"""
+        self.index.add(self._embed(text))
+        self.entries.append({'sha': sha, 'comment': comment, 'ts': int(time.time())})
+        self.dirty = True
+    
+    def save(self):
+        """Prune and persist the index and entries if anything was added"""
+        if not self.dirty:
+            return
+        self._prune()
+        try:
+            os.makedirs(os.path.dirname(SEMANTIC_INDEX_PATH), exist_ok=True)
+            self.faiss.write_index(self.index, SEMANTIC_INDEX_PATH)
+            with open(SEMANTIC_ENTRIES_PATH, 'wb') as f:
+                f.write(json_dumps(self.entries))
+        except (OSError, RuntimeError):
+            pass
+        self.dirty = False
+
+
+def get_semantic_cache() -> Optional[SemanticCache]:
+    """Get the semantic cache, loading its model and index on first use"""
+    global _SEMANTIC_CACHE
+    if _SEMANTIC_CACHE is None:
+        try:
+            _SEMANTIC_CACHE = SemanticCache()
+            atexit.register(_SEMANTIC_CACHE.save)
+        except ImportError:
+            print_color("⚠️  Semantic cache needs sentence-transformers and faiss-cpu, skipping it", YELLOW)
+            print_color("   pip3 install sentence-transformers faiss-cpu", YELLOW)
+            _SEMANTIC_CACHE = False
+        except Exception as e:
+            # e.g. the embedding model can't be downloaded while offline
+            print_color(f"⚠️  Could not load the semantic cache, skipping it: {str(e)}", YELLOW)
+            _SEMANTIC_CACHE = False
+    return _SEMANTIC_CACHE or None
+
+
+# A provider attempt for race_providers: called as fn(cancel, on_response, primary)
+ProviderAttempt = Callable[[threading.Event, Callable[[], None], bool], Optional[str]]
+
+
+def race_providers(
+    attempts: List[Tuple[str, float, ProviderAttempt]],
+    validate: Optional[Callable[[str], bool]] = None
+) -> Optional[str]:
+    """
+    Run provider attempts as hedged requests and return the first successful result.
+
+    Each attempt is a (name, start_delay, fn) tuple in priority order. An attempt
+    fires once every higher-priority attempt has failed, or once start_delay has
+    passed without any of them having started to respond (reported through the
+    on_response callback) - a provider that is already answering is left to
+    finish. As soon as one attempt succeeds, the shared cancel event is set:
+    attempts still streaming close their responses, and pending ones never fire.
+    `primary` tells an attempt whether every higher-priority one had already
+    failed when it started, i.e. whether it is now the one we're relying on.
+    A result rejected by `validate` counts as a failure rather than a win.
+    """
+    results = queue.Queue()
+    state = threading.Condition()
+    responding = [False] * len(attempts)
+    failed = [False] * len(attempts)
+    finished = threading.Event()
+
+    def should_start(index: int, deadline: float) -> bool:
+        earlier = range(index)
+        if all(failed[i] for i in earlier):
+            return True
+        return time.monotonic() >= deadline and not any(responding[i] and not failed[i] for i in earlier)
+
+    def run(index: int, name: str, start_delay: float, fn: ProviderAttempt):
+        deadline = time.monotonic() + start_delay
+        with state:
+            while not finished.is_set() and not should_start(index, deadline):
+                remaining = deadline - time.monotonic()
+                state.wait(remaining if remaining > 0 else None)
+        
+        def on_response():
+            with state:
+                responding[index] = True
+                state.notify_all()
+        
+        with state:
+            primary = all(failed[:index])
+        
+        comment = None
+        if not finished.is_set():
+            print_color(f"🤖 Generating natural comment with {name}...", BLUE)
+            try:
+                comment = fn(finished, on_response, primary)
+            except Exception as e:
+                print_color(f"❌ {name} error: {str(e)}", RED)
+            if comment and validate is not None and not validate(comment):
+                print_color(f"⚠️  {name} returned a malformed reply", YELLOW)
+                comment = None
+        
+        with state:
+            if not comment:
+                failed[index] = True
+            state.notify_all()
+        results.put(comment)
+
+    for index, (name, start_delay, fn) in enumerate(attempts):
+        threading.Thread(target=run, args=(index, name, start_delay, fn), daemon=True).start()
+
+    for _ in attempts:
+        comment = results.get()
+        if comment:
+            with state:
+                finished.set()
+                state.notify_all()
+            return comment
+    return None
+
+
+def report_no_provider():
+    """Explain how to configure an AI provider when none could generate a comment"""
     print_color("❌ No AI provider available or all failed", RED)
     print_color("💡 Options:", YELLOW)
     print_color("   - Set OPENAI_API_KEY environment variable", YELLOW)
     print_color("   - Set ANTHROPIC_API_KEY environment variable", YELLOW)
     print_color("   - Install and authenticate cursor-agent", YELLOW)
+
+
+def comment_cache_key(commit_info: Dict[str, Any], max_tokens: int) -> str:
+    """Cache key covering the models, output budget and everything the prompt for a commit is built from"""
+    return hashlib.sha256(
+        f"{commit_info.get('sha', '')}|{openai_model()}|{CLAUDE_MODEL}|{max_tokens}|{PROMPT_DIGEST}|"
+        f"{json.dumps(commit_info, sort_keys=True)}".encode('utf-8')
+    ).hexdigest()
+
+
+def lookup_providers() -> Tuple[Optional[str], Optional[str], Optional[str]]:
+    """
+    Resolve the OpenAI key, Anthropic key and cursor-agent path concurrently.
+    
+    The key lookups may each shell out to the keychain, so overlapping them
+    with each other and with the PATH search makes this cost the slowest of
+    the three rather than their sum.
+    """
+    openai_future = _EXECUTOR.submit(get_openai_api_key)
+    claude_future = _EXECUTOR.submit(get_anthropic_api_key)
+    cursor_future = _EXECUTOR.submit(find_cursor_agent)
+    return openai_future.result(), claude_future.result(), cursor_future.result()
+
+
+def race_api_providers(
+    system_prompt: str,
+    prompt: str,
+    openai_key: Optional[str],
+    claude_key: Optional[str],
+    max_tokens: int,
+    json_mode: bool = False,
+    timeout: Optional[float] = None,
+    validate: Optional[Callable[[str], bool]] = None
+) -> Optional[str]:
+    """
+    Race the API providers we have keys for, preferring OpenAI and hedging with Claude.
+    
+    Only a provider that is primary when it starts (every higher-priority one has
+    already failed) retries transient failures; a hedge racing a slow primary
+    gets a single attempt. Replies rejected by `validate` don't win the race.
+    """
+    read_timeout = API_READ_TIMEOUT if timeout is None else timeout
+    attempts = []
+    if openai_key:
+        attempts.append(('OpenAI', OPENAI_START_DELAY, lambda cancel, on_response, primary: generate_with_openai(
+            system_prompt, prompt, openai_key, max_tokens, json_mode, read_timeout,
+            RETRY_ATTEMPTS if primary else 1, cancel, on_response
+        )))
+    
+    if claude_key:
+        attempts.append(('Claude', CLAUDE_START_DELAY, lambda cancel, on_response, primary: generate_with_claude(
+            system_prompt, prompt, claude_key, max_tokens, json_mode, read_timeout,
+            RETRY_ATTEMPTS if primary else 1, cancel, on_response
+        )))
+    
+    return race_providers(attempts, validate) if attempts else None
+
+
+def generate_comment(
+    commit_info: Dict[str, Any],
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    timeout: Optional[float] = None,
+    semantic_cache: bool = False
+) -> Optional[str]:
+    """
+    Generate a natural Jira comment using available AI providers.
+    
+    `timeout` overrides the per-provider API read timeout and the cursor-agent
+    timeout. With `semantic_cache`, a near-identical earlier commit's comment is
+    reused instead of calling a provider.
+    """
+    
+    # The cache key covers everything the prompt is built from, so a hit
+    # needs neither the prompt nor any provider lookups
+    cache_key = None
+    if cache_enabled():
+        cache_key = comment_cache_key(commit_info, max_tokens)
+        cached = _cache_get(cache_key)
+        if cached:
+            print_color("💾 Using cached comment for this commit", GREEN)
+            return cached
+    
+    semantic = get_semantic_cache() if semantic_cache and cache_enabled() else None
+    if semantic:
+        similar = semantic.lookup(semantic_text(commit_info), commit_info.get('sha', ''))
+        if similar:
+            print_color("💾 Reusing the comment of a near-identical commit", GREEN)
+            return similar
+    
+    openai_key, claude_key, cursor_agent = lookup_providers()
+    
+    # Only build the prompt once we know some provider can use it
+    if not (openai_key or claude_key or cursor_agent):
+        report_no_provider()
+        return None
+    
+    system_prompt, prompt = build_natural_prompt(commit_info)
+    
+    comment = race_api_providers(system_prompt, prompt, openai_key, claude_key, max_tokens, timeout=timeout)
+    
+    if not comment:
+        # Try Cursor Agent
+        print_color("🎨 Trying Cursor Agent...", BLUE)
+        comment = generate_with_cursor(f"{system_prompt}\n\n{prompt}", CURSOR_TIMEOUT if timeout is None else timeout)
+    
+    if comment:
+        comment = clean_ai_response(comment)
+        if cache_key:
+            _cache_put(cache_key, comment)
+        if semantic:
+            semantic.add(semantic_text(commit_info), commit_info.get('sha', ''), comment)
+        return comment
+    
+    report_no_provider()
     return None
 
 
+def split_batch(prompts: List[str]) -> List[List[int]]:
+    """
+    Group prompt indexes into sub-batches that fit the batch limits.
+    
+    Sizes are estimated at ~4 characters per token; a single prompt over the
+    budget still gets a sub-batch of its own.
+    """
+    batches = []
+    current = []
+    current_tokens = 0
+    for index, prompt in enumerate(prompts):
+        tokens = len(prompt) // 4
+        if current and (len(current) >= BATCH_MAX_COMMITS or current_tokens + tokens > BATCH_PROMPT_TOKEN_BUDGET):
+            batches.append(current)
+            current = []
+            current_tokens = 0
+        current.append(index)
+        current_tokens += tokens
+    if current:
+        batches.append(current)
+    return batches
+
+
+def build_batch_prompt(prompts: List[str]) -> str:
+    """Combine several per-commit prompts into one request for a JSON list of comments"""
+    sections = [BATCH_PROMPT_HEADER.format(count=len(prompts))]
+    for number, prompt in enumerate(prompts, 1):
+        sections.append(f"=== COMMIT {number} ===\n{prompt}")
+    return '\n\n'.join(sections)
+
+
+def parse_batch_response(text: Optional[str], count: int) -> Optional[List[str]]:
+    """Extract the list of comments from a batch response, or None if it's malformed"""
+    if not text:
+        return None
+    try:
+        comments = json_loads(text)['comments']
+    except (ValueError, TypeError, KeyError):
+        return None
+    if not isinstance(comments, list) or len(comments) != count:
+        return None
+    if not all(isinstance(comment, str) and comment.strip() for comment in comments):
+        return None
+    return comments
+
+
+def process_batch(
+    commit_infos: List[Dict[str, Any]],
+    max_tokens: int = DEFAULT_MAX_TOKENS,
+    timeout: Optional[float] = None,
+    semantic_cache: bool = False
+) -> List[Optional[str]]:
+    """
+    Generate Jira comments for several commits, sharing API calls between them.
+    
+    Cached commits (and, with `semantic_cache`, near-identical ones) are
+    answered from the cache; the rest are sent in sub-batches,
+    each a single API call that returns a JSON list of comments. Any sub-batch
+    that fails or comes back malformed falls back to one call per commit.
+    """
+    comments: List[Optional[str]] = [None] * len(commit_infos)
+    cache_keys = [comment_cache_key(info, max_tokens) if cache_enabled() else None for info in commit_infos]
+    
+    pending = []
+    for index, cache_key in enumerate(cache_keys):
+        cached = _cache_get(cache_key) if cache_key else None
+        if cached:
+            comments[index] = cached
+        else:
+            pending.append(index)
+    if len(pending) < len(commit_infos):
+        print_color(f"💾 Using cached comments for {len(commit_infos) - len(pending)} commit(s)", GREEN)
+    if not pending:
+        return comments
+    
+    semantic = get_semantic_cache() if semantic_cache and cache_enabled() else None
+    if semantic:
+        still_pending = []
+        for index in pending:
+            info = commit_infos[index]
+            comments[index] = semantic.lookup(semantic_text(info), info.get('sha', ''))
+            if not comments[index]:
+                still_pending.append(index)
+        if len(still_pending) < len(pending):
+            print_color(f"💾 Reusing comments of near-identical commits for {len(pending) - len(still_pending)} commit(s)", GREEN)
+        if not still_pending:
+            return comments
+        pending = still_pending
+    
+    openai_key, claude_key, _ = lookup_providers()
+    prompts = [build_natural_prompt(commit_infos[index])[1] for index in pending]
+    
+    for batch in split_batch(prompts):
+        batch_indexes = [pending[i] for i in batch]
+        batch_comments = None
+        if len(batch) > 1 and (openai_key or claude_key):
+            print_color(f"📦 Generating {len(batch)} comments in one request...", BLUE)
+            response = race_api_providers(
+                SYSTEM_PROMPT,
+                build_batch_prompt([prompts[i] for i in batch]),
+                openai_key,
+                claude_key,
+                min(max_tokens * len(batch), BATCH_MAX_OUTPUT_TOKENS),
+                json_mode=True,
+                timeout=timeout,
+                validate=lambda text: parse_batch_response(text, len(batch)) is not None
+            )
+            batch_comments = parse_batch_response(response, len(batch))
+            if batch_comments is None:
+                print_color("⚠️  Batch request failed, generating comments one at a time...", YELLOW)
+        
+        if batch_comments is None:
+            for index in batch_indexes:
+                comments[index] = generate_comment(commit_infos[index], max_tokens, timeout, semantic_cache)
+            continue
+        
+        for index, comment in zip(batch_indexes, batch_comments):
+            comment = clean_ai_response(comment.strip())
+            comments[index] = comment
+            if cache_keys[index]:
+                _cache_put(cache_keys[index], comment)
+            if semantic:
+                semantic.add(semantic_text(commit_infos[index]), commit_infos[index].get('sha', ''), comment)
+    
+    return comments
+
+
+def positive_int(value: str) -> int:
+    """argparse type for an integer greater than zero"""
+    try:
+        number = int(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid integer: {value!r}")
+    if number <= 0:
+        raise argparse.ArgumentTypeError(f"must be greater than 0: {value!r}")
+    return number
+
+
+def positive_float(value: str) -> float:
+    """argparse type for a finite number greater than zero"""
+    try:
+        number = float(value)
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid number: {value!r}")
+    if not 0 < number < float('inf'):
+        raise argparse.ArgumentTypeError(f"must be a finite number greater than 0: {value!r}")
+    return number
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Generate natural, human-sounding Jira comments for commits'
     )
-    parser.add_argument('--commit-sha', required=True, help='Git commit SHA')
-    parser.add_argument('--commit-message', required=True, help='Commit message')
-    parser.add_argument('--branch', required=True, help='Git branch name')
-    parser.add_argument('--author', required=True, help='Commit author')
-    parser.add_argument('--date', required=True, help='Commit date')
+    parser.add_argument('--commit-sha', help='Git commit SHA (required without --json-input)')
+    parser.add_argument('--commit-message', help='Commit message (required without --json-input)')
+    parser.add_argument('--branch', help='Git branch name (required without --json-input)')
+    parser.add_argument('--author', help='Commit author (required without --json-input)')
+    parser.add_argument('--date', help='Commit date (required without --json-input)')
     parser.add_argument('--commit-url', default='', help='URL to commit')
     parser.add_argument('--diff-summary', default='', help='Summary of changes')
     parser.add_argument('--files-changed', type=int, default=0, help='Number of files changed')
     parser.add_argument('--ticket-details', default='', help='Jira ticket details')
-    parser.add_argument('--json-input', help='Path to JSON file with all commit info')
+    parser.add_argument('--json-input',
+                        help='Path to JSON file with all commit info, or a list of them for batch mode')
+    parser.add_argument('--max-tokens', type=positive_int, default=DEFAULT_MAX_TOKENS,
+                        help=f'Maximum tokens to generate (default: {DEFAULT_MAX_TOKENS})')
+    parser.add_argument('--semantic-cache', action='store_true',
+                        help='Reuse comments of near-identical earlier commits '
+                             '(needs sentence-transformers and faiss-cpu)')
+    parser.add_argument('--timeout', type=positive_float,
+                        help=f'Seconds to wait on each provider (default: {API_READ_TIMEOUT}s read timeout '
+                             f'for APIs, {CURSOR_TIMEOUT}s for cursor-agent)')
     
     args = parser.parse_args()
     
+    if not args.json_input:
+        missing = [
+            f"--{name.replace('_', '-')}"
+            for name in ('commit_sha', 'commit_message', 'branch', 'author', 'date')
+            if getattr(args, name) is None
+        ]
+        if missing:
+            parser.error(f"the following arguments are required: {', '.join(missing)}")
+    
     # Build commit info dict
     if args.json_input:
         # Read from JSON file
         try:
-            with open(args.json_input, 'r') as f:
-                commit_info = json.load(f)
+            with open(args.json_input, 'rb') as f:
+                commit_info = json_loads(f.read())
+            items = commit_info if isinstance(commit_info, list) else [commit_info]
+            for index, item in enumerate(items):
+                if not isinstance(item, dict):
+                    where = f"item {index}" if isinstance(commit_info, list) else "input"
+                    raise ValueError(f"{where} is not a JSON object")
         except Exception as e:
             print_color(f"❌ Failed to read JSON input: {str(e)}", RED)
             sys.exit(1)
@@ -401,8 +1355,17 @@ def main():
             'ticket_details': args.ticket_details
         }
     
+    # Batch mode: a list of commits produces a JSON list of comments
+    if isinstance(commit_info, list):
+        comments = process_batch(commit_info, args.max_tokens, args.timeout, args.semantic_cache)
+        print(json.dumps(comments, ensure_ascii=False))
+        if all(comments):
+            sys.exit(0)
+        print_color(f"❌ Failed to generate {comments.count(None)} of {len(comments)} comments", RED)
+        sys.exit(1)
+    
     # Generate comment
-    comment = generate_comment(commit_info)
+    comment = generate_comment(commit_info, args.max_tokens, args.timeout, args.semantic_cache)
     
     if comment:
         # Output the comment to stdout